@@ -8,7 +8,7 @@ Security measures implemented:
 - No shell command execution
 - Sandboxed file processing
 - Input sanitization
-- LFI prevention (UUID-based filenames, fixed export directory)
+- Downloads built in memory (no export files written to disk)
 """
 
 import streamlit as st
@@ -21,27 +21,27 @@ warnings.filterwarnings("ignore")
 # Import from modules package
 from modules.config import (
     ALLOWED_DEPT_EXTENSIONS, 
-    ALLOWED_PDF_EXTENSION,
-    EXPORT_CLEANUP_HOURS
+    ALLOWED_PDF_EXTENSION
 )
 
 from modules.security import (
     validate_file_size,
-    validate_file_extension,
-    cleanup_old_exports,
-    save_export_file
+    validate_file_extension
 )
 
 from modules.pdf_processor import process_pdf
 
 from modules.data_processor import (
     load_department_data,
-    merge_grades_with_department,
+    build_grade_lookup,
+    apply_pending_grades,
     calculate_sgpa_and_rank,
-    get_existing_modules
+    get_existing_modules,
+    build_export_bytes
 )
 
 from modules.ui_components import (
+    configure_page,
     render_header,
     render_how_it_works,
     render_existing_modules_banner,
@@ -52,6 +52,7 @@ from modules.ui_components import (
 
 def main():
     """Main application entry point."""
+    configure_page()
     render_header()
     render_how_it_works()
     
@@ -61,7 +62,10 @@ def main():
     if 'weights' not in st.session_state:
         st.session_state.weights = {}
     if 'processed_modules' not in st.session_state:
-        st.session_state.processed_modules = []
+        # Insertion-ordered dict used as an ordered set of module codes
+        st.session_state.processed_modules = {}
+    if 'pending_grades' not in st.session_state:
+        st.session_state.pending_grades = {}
     
     # =========================================================================
     # STEP 1: Department File Upload
@@ -103,18 +107,23 @@ def main():
                     
                     # Check for existing modules in the NEW file
                     existing_modules = get_existing_modules(df)
-                    st.session_state.processed_modules = existing_modules
+                    st.session_state.processed_modules = dict.fromkeys(existing_modules)
                     st.session_state.weights = {}
+                    st.session_state.pending_grades = {}
             
             # Display info for loaded department file
             if st.session_state.department_df is not None:
                 df = st.session_state.department_df
+                pending_grades = st.session_state.pending_grades
+                
+                # Grade columns staged from PDFs are shown as part of the data already
+                column_count = len(df.columns) + sum(col not in df.columns for col in pending_grades)
                 
                 st.markdown(f"""
                 <div class="success-box">
                     <h4>✅ Department File Loaded Successfully!</h4>
                     <p><strong>{len(df)}</strong> students found | 
-                    <strong>{len(df.columns)}</strong> columns | 
+                    <strong>{column_count}</strong> columns | 
                     <strong>{len(st.session_state.processed_modules)}</strong> module grades</p>
                 </div>
                 """, unsafe_allow_html=True)
@@ -122,13 +131,13 @@ def main():
                 # Show existing modules and weight inputs
                 if st.session_state.processed_modules:
                     st.session_state.weights = render_existing_modules_banner(
-                        st.session_state.processed_modules, 
+                        list(st.session_state.processed_modules), 
                         st.session_state.weights
                     )
                 
                 # Preview data
                 with st.expander("👀 Preview Department Data", expanded=False):
-                    st.dataframe(st.session_state.department_df.head(10), use_container_width=True)
+                    st.dataframe(apply_pending_grades(df.head(10), pending_grades), use_container_width=True)
     
     # =========================================================================
     # STEP 2: Add Result PDFs
@@ -203,21 +212,14 @@ def main():
                             # Check if module already exists
                             if module_code in st.session_state.processed_modules:
                                 st.warning(f"⚠️ Module **{module_code}** already exists. Updating grades.")
-                                old_col = f"{module_code}_Grade"
-                                if old_col in st.session_state.department_df.columns:
-                                    st.session_state.department_df = st.session_state.department_df.drop(columns=[old_col])
                             
-                            # Merge grades
-                            st.session_state.department_df = merge_grades_with_department(
-                                st.session_state.department_df,
-                                grades_df,
-                                module_code
-                            )
+                            # Stage grades - columns are added to the department data in one
+                            # pass when rankings are generated (replacing any existing column)
+                            st.session_state.pending_grades[f"{module_code}_Grade"] = build_grade_lookup(grades_df)
                             
                             # Update weights and modules list
                             st.session_state.weights[module_code] = new_weight
-                            if module_code not in st.session_state.processed_modules:
-                                st.session_state.processed_modules.append(module_code)
+                            st.session_state.processed_modules[module_code] = None
                             
                             st.success(f"""
                             ✅ **{module_code} - {module_name}** added successfully!
@@ -232,19 +234,28 @@ def main():
             st.markdown("---")
             st.markdown("### 📋 Current Modules in Your Data")
             
-            module_info = []
-            for module in st.session_state.processed_modules:
-                weight = st.session_state.weights.get(module, "Not set")
-                grade_col = f"{module}_Grade"
-                if grade_col in st.session_state.department_df.columns:
-                    grades_found = (st.session_state.department_df[grade_col] != 'N/A').sum()
-                else:
-                    grades_found = 0
-                module_info.append({
+            dept_df = st.session_state.department_df
+            pending_grades = st.session_state.pending_grades
+            
+            # Count grades for all grade columns already in the data in one pass
+            grade_cols = [
+                f"{module}_Grade" for module in st.session_state.processed_modules
+                if f"{module}_Grade" in dept_df.columns and f"{module}_Grade" not in pending_grades
+            ]
+            grades_found = dict(zip(grade_cols, (dept_df[grade_cols].to_numpy() != 'N/A').sum(axis=0)))
+            
+            # Staged modules are counted straight from their lookups
+            for grade_col, grades_lookup in pending_grades.items():
+                grades_found[grade_col] = dept_df['Index'].isin(grades_lookup.index).sum()
+            
+            module_info = [
+                {
                     "Module Code": module,
-                    "Weight (Credits)": weight,
-                    "Grades Found": grades_found
-                })
+                    "Weight (Credits)": st.session_state.weights.get(module, "Not set"),
+                    "Grades Found": grades_found.get(f"{module}_Grade", 0)
+                }
+                for module in st.session_state.processed_modules
+            ]
             
             st.dataframe(pd.DataFrame(module_info), use_container_width=True, hide_index=True)
     
@@ -266,9 +277,17 @@ def main():
         else:
             if st.button("🚀 Generate SGPA & Rankings", type="primary", use_container_width=True):
                 with st.spinner("Calculating SGPA and generating rankings..."):
+                    # Add all staged grade columns at once
+                    st.session_state.department_df = apply_pending_grades(
+                        st.session_state.department_df,
+                        st.session_state.pending_grades
+                    )
+                    st.session_state.pending_grades = {}
+                    
                     result_df = calculate_sgpa_and_rank(
-                        st.session_state.department_df.copy(),
-                        st.session_state.weights
+                        st.session_state.department_df,
+                        st.session_state.weights,
+                        list(st.session_state.processed_modules)
                     )
                     st.session_state.result_df = result_df
                     st.session_state.ranking_generated = True
@@ -311,15 +330,11 @@ def main():
                 # Download buttons
                 st.markdown("### 📥 Download Results")
                 
-                cleanup_old_exports(max_age_hours=EXPORT_CLEANUP_HOURS)
-                
                 col1, col2 = st.columns(2)
                 
                 with col1:
                     try:
-                        csv_filename, csv_filepath = save_export_file(result_df, 'csv')
-                        with open(csv_filepath, 'rb') as f:
-                            csv_data = f.read()
+                        csv_data = build_export_bytes(result_df, 'csv')
                         st.download_button(
                             label="📄 Download as CSV",
                             data=csv_data,
@@ -333,9 +348,7 @@ def main():
                 
                 with col2:
                     try:
-                        xlsx_filename, xlsx_filepath = save_export_file(result_df, 'xlsx')
-                        with open(xlsx_filepath, 'rb') as f:
-                            xlsx_data = f.read()
+                        xlsx_data = build_export_bytes(result_df, 'xlsx')
                         st.download_button(
                             label="📊 Download as Excel",
                             data=xlsx_data,
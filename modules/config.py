@@ -9,11 +9,10 @@ MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
 
 ALLOWED_DEPT_EXTENSIONS = ['.csv', '.xlsx', '.xls']
 ALLOWED_PDF_EXTENSION = '.pdf'
-ALLOWED_EXPORT_EXTENSIONS = {'.csv', '.xlsx'}
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-EXPORTS_DIR = os.path.join(BASE_DIR, "exports")
-os.makedirs(EXPORTS_DIR, exist_ok=True)
+
+STYLESHEET_PATH = os.path.join(BASE_DIR, "static", "uom.css")
 
 GRADE_POINTS = {
     'A+': 4.0, 'A': 4.0, 'A-': 3.7,
@@ -22,4 +21,5 @@ GRADE_POINTS = {
     'D': 1.0, 'I-we': 0.0, 'I-ca': 0.0, 'F': 0.0, 'AB': 0.0
 }
 
-EXPORT_CLEANUP_HOURS = 0.5
+# Categories for grade columns ('N/A' marks students missing from a result PDF)
+GRADE_CATEGORIES = list(GRADE_POINTS) + ['N/A']
@@ -5,19 +5,27 @@ Handles loading, merging, and SGPA calculation.
 
 import io
 from typing import Dict, List, Optional
+import numpy as np
 import pandas as pd
 import streamlit as st
 
 from .config import GRADE_POINTS
 
 
+@st.cache_data(show_spinner=False, max_entries=8)
 def load_department_data(file_bytes: bytes, filename: str) -> Optional[pd.DataFrame]:
     """Load department data from uploaded file."""
     try:
         if filename.endswith('.csv'):
+            # Default C engine: the pyarrow engine turns non-UTF-8 text into bytes
+            # and drops duplicate headers instead of renaming them to Name.1
             df = pd.read_csv(io.BytesIO(file_bytes))
         else:
-            df = pd.read_excel(io.BytesIO(file_bytes))
+            try:
+                df = pd.read_excel(io.BytesIO(file_bytes), engine='calamine')
+            except (ImportError, ValueError):
+                # python-calamine missing (or pandas < 2.2) - use the default engine
+                df = pd.read_excel(io.BytesIO(file_bytes))
         
         # Validate required column
         if 'Index' not in df.columns:
@@ -30,65 +38,115 @@ def load_department_data(file_bytes: bytes, filename: str) -> Optional[pd.DataFr
         return None
 
 
-def merge_grades_with_department(
-    dept_df: pd.DataFrame, 
-    grades_df: pd.DataFrame,
-    module_code: str
+def build_grade_lookup(grades_df: pd.DataFrame) -> pd.Series:
+    """Build a Grade series indexed by Index_No (first occurrence wins for duplicates)."""
+    return grades_df.drop_duplicates(subset='Index_No').set_index('Index_No')['Grade']
+
+
+def apply_pending_grades(
+    dept_df: pd.DataFrame,
+    pending_grades: Dict[str, pd.Series]
 ) -> pd.DataFrame:
-    """Merge grades data with department data."""
-    grade_column = f"{module_code}_Grade"
+    """
+    Add all staged grade columns to the department data in one pass.
     
-    # Prepare grades for merging
-    grades_merge = grades_df[['Index_No', 'Grade']].copy()
-    grades_merge = grades_merge.rename(columns={'Grade': grade_column})
+    Args:
+        pending_grades: Grade column name -> lookup from build_grade_lookup
     
-    # Merge with department data
-    merged_df = dept_df.merge(
-        grades_merge, 
-        left_on='Index', 
-        right_on='Index_No', 
-        how='left'
-    )
+    Returns:
+        New DataFrame; existing columns with the same name are replaced
+    """
+    if not pending_grades:
+        return dept_df
     
-    # Clean up
-    if 'Index_No' in merged_df.columns:
-        merged_df = merged_df.drop('Index_No', axis=1)
+    new_columns = pd.DataFrame(
+        {col: dept_df['Index'].map(lookup) for col, lookup in pending_grades.items()},
+        index=dept_df.index
+    ).fillna('N/A')
     
-    merged_df[grade_column] = merged_df[grade_column].fillna('N/A')
+    kept_df = dept_df.drop(columns=[col for col in new_columns.columns if col in dept_df.columns])
+    return pd.concat([kept_df, new_columns], axis=1)
+
+
+def _grade_points(grades: pd.Series) -> np.ndarray:
+    """Map a grade column to grade points, NaN where the grade doesn't count."""
+    if isinstance(grades.dtype, pd.CategoricalDtype):
+        # Gather from a per-category lookup table; the trailing NaN serves code -1 (missing)
+        lookup = np.array(
+            [GRADE_POINTS.get(grade, np.nan) for grade in grades.cat.categories] + [np.nan],
+            dtype=np.float64
+        )
+        return lookup[grades.cat.codes.to_numpy()]
     
-    return merged_df
+    return grades.map(GRADE_POINTS).to_numpy(dtype=np.float64, na_value=np.nan)
 
 
-def calculate_sgpa_and_rank(df: pd.DataFrame, weights: Dict[str, float]) -> pd.DataFrame:
-    """Calculate SGPA and rank for all students."""
-    grade_columns = [col for col in df.columns if col.endswith('_Grade')]
+@st.cache_data(show_spinner=False, max_entries=8)
+def calculate_sgpa_and_rank(
+    df: pd.DataFrame,
+    weights: Dict[str, float],
+    modules: List[str]
+) -> pd.DataFrame:
+    """
+    Calculate SGPA and rank for all students over the given modules.
     
-    def calc_student_sgpa(row):
-        total_weighted_points = 0.0
-        total_credits = 0.0
-        
-        for col in grade_columns:
-            grade = row[col]
-            module_code = col.replace('_Grade', '')
-            
-            if pd.notna(grade) and grade in GRADE_POINTS and module_code in weights:
-                weight = weights[module_code]
-                points = GRADE_POINTS[grade]
-                total_weighted_points += points * weight
-                total_credits += weight
-        
-        if total_credits == 0:
-            return 0.0
-        return round(total_weighted_points / total_credits, 3)
+    Returns:
+        New DataFrame sorted by rank with SGPA and Rank columns added
+    """
+    modules = set(modules)
+    grade_columns = [
+        col for col in df.columns
+        if col.endswith('_Grade') and col.replace('_Grade', '') in modules
+        and col.replace('_Grade', '') in weights
+    ]
+    
+    # Accumulate one module at a time in column order, the same order a per-row
+    # loop adds them in, so the float sums (and with them SGPAs and ties) match
+    total_weighted_points = np.zeros(len(df))
+    total_credits = np.zeros(len(df))
+    for col in grade_columns:
+        weight = weights[col.replace('_Grade', '')]
+        points = _grade_points(df[col])
+        graded = ~np.isnan(points)
+        total_weighted_points += np.where(graded, points * weight, 0.0)
+        total_credits += np.where(graded, weight, 0.0)
+    
+    sgpa = np.divide(
+        total_weighted_points,
+        total_credits,
+        out=np.zeros_like(total_credits),
+        where=total_credits > 0
+    )
     
-    df['SGPA'] = df.apply(calc_student_sgpa, axis=1)
-    df['Rank'] = df['SGPA'].rank(method='min', ascending=False).astype(int)
-    df = df.sort_values('Rank')
+    # Python's round, not np.round - that scales by 1000 and rounds half-to-even,
+    # which gives e.g. 2.738 instead of 2.737 for 2.7375
+    sgpa = np.array([round(value, 3) for value in sgpa.tolist()], dtype=np.float64)
     
-    return df
+    ranks = pd.Series(sgpa).rank(method='min', ascending=False).astype(int).to_numpy()
+    
+    # Reorder once into the result frame - the input frame is left untouched
+    order = np.argsort(ranks, kind='stable')
+    ranked_df = df.take(order)
+    ranked_df['SGPA'] = sgpa[order]
+    ranked_df['Rank'] = ranks[order]
+    
+    return ranked_df
 
 
 def get_existing_modules(df: pd.DataFrame) -> List[str]:
     """Get list of module codes already in the dataframe."""
     grade_columns = [col for col in df.columns if col.endswith('_Grade')]
     return [col.replace('_Grade', '') for col in grade_columns]
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def build_export_bytes(df: pd.DataFrame, file_format: str) -> bytes:
+    """Serialize a dataframe for download in memory (nothing is written to disk)."""
+    if file_format == 'csv':
+        return df.to_csv(index=False).encode('utf-8')
+    if file_format == 'xlsx':
+        buffer = io.BytesIO()
+        with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+            df.to_excel(writer, index=False, sheet_name='Rankings')
+        return buffer.getvalue()
+    raise ValueError("Invalid format. Allowed: ['csv', 'xlsx']")
@@ -5,15 +5,33 @@ Handles extraction of grades from result PDFs.
 
 import io
 import re
-from typing import List, Dict, Tuple, Optional
+from typing import List, Tuple, Optional
 import pandas as pd
 import streamlit as st
 
+from .config import GRADE_CATEGORIES
 from .security import sanitize_string
 
+# Pattern like "MA1014 - Mathematics" or "CS2043 - Operating Systems"
+_MODULE_RE = re.compile(r'([A-Z]{2}\d{4})\s*-\s*([A-Za-z\s]+?)(?=\n|Intake|$)')
+_MODULE_CODE_RE = re.compile(r'[A-Z]{2}\d{4}')
+# Pattern: Index number (6 digits + letter) followed by grade
+_GRADE_RE = re.compile(r'(\d{6}[A-Z])\s+(I-(?:we|ca)|[A-Z][+-]?)')
+
 
 def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
-    """Extract text from PDF bytes using PyPDF2."""
+    """Extract text from PDF bytes using PyMuPDF, with PyPDF2 and pdfplumber fallbacks."""
+    try:
+        import pymupdf
+        # Pages are read sequentially on purpose: PyMuPDF is not thread-safe and
+        # holds the GIL while extracting, so a thread pool cannot speed this up.
+        with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+            return "\n".join(page.get_text() for page in doc)
+    except ImportError:
+        pass  # PyMuPDF not installed - use the pure-Python extractors
+    except Exception as e:
+        st.warning(f"PyMuPDF extraction failed, trying PyPDF2: {str(e)[:50]}")
+    
     try:
         import PyPDF2
         pdf_file = io.BytesIO(pdf_bytes)
@@ -34,6 +52,8 @@ def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
             with pdfplumber.open(pdf_file) as pdf:
                 for page in pdf.pages:
                     page_text = page.extract_text()
+                    # Drop the cached layout objects so pages don't pile up in memory
+                    page.flush_cache()
                     if page_text:
                         text += page_text + "\n"
             return text
@@ -47,9 +67,7 @@ def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
 
 def extract_module_info(text: str) -> Tuple[str, str]:
     """Extract module code and name from text."""
-    # Pattern like "MA1014 - Mathematics" or "CS2043 - Operating Systems"
-    module_pattern = r'([A-Z]{2}\d{4})\s*-\s*([A-Za-z\s]+?)(?=\n|Intake|$)'
-    match = re.search(module_pattern, text)
+    match = _MODULE_RE.search(text)
     
     if match:
         module_code = match.group(1).strip()
@@ -57,31 +75,24 @@ def extract_module_info(text: str) -> Tuple[str, str]:
         return module_code, module_name
     
     # Fallback - just get module code
-    code_pattern = r'[A-Z]{2}\d{4}'
-    match = re.search(code_pattern, text)
+    match = _MODULE_CODE_RE.search(text)
     if match:
         return match.group(0), "Unknown Module"
     
     return "Unknown", "Unknown Module"
 
 
-def parse_grades(text: str) -> List[Dict[str, str]]:
-    """Parse student grades from extracted text."""
-    grades_data = []
-    
-    # Pattern: Index number (6 digits + letter) followed by grade
-    grade_pattern = r'(\d{6}[A-Z])\s+(I-we|I-ca|[A-Z][+-]?|F|D)'
-    matches = re.findall(grade_pattern, text)
-    
-    for index_no, grade in matches:
-        grades_data.append({
-            'Index_No': sanitize_string(index_no),
-            'Grade': sanitize_string(grade)
-        })
-    
-    return grades_data
+def parse_grades(text: str) -> List[Tuple[str, str]]:
+    """Parse student (index number, grade) pairs from extracted text."""
+    # Scan the whole text rather than line by line: extractors may put the
+    # index number and its grade on separate lines
+    return [
+        (sanitize_string(index_no), sanitize_string(grade))
+        for index_no, grade in _GRADE_RE.findall(text)
+    ]
 
 
+@st.cache_data(show_spinner=False, max_entries=8)
 def process_pdf(pdf_bytes: bytes, filename: str) -> Tuple[Optional[pd.DataFrame], str, str]:
     """
     Process a PDF file and extract grades.
@@ -100,7 +111,11 @@ def process_pdf(pdf_bytes: bytes, filename: str) -> Tuple[Optional[pd.DataFrame]
     if not grades_data:
         return None, module_code, module_name
     
-    df = pd.DataFrame(grades_data)
+    df = pd.DataFrame(grades_data, columns=['Index_No', 'Grade'])
+    
+    # Store grades as a categorical; unexpected grades get their own category
+    extra_grades = sorted(set(df['Grade']) - set(GRADE_CATEGORIES))
+    df['Grade'] = pd.Categorical(df['Grade'], categories=GRADE_CATEGORIES + extra_grades)
     df['Module_Code'] = module_code
     df['Module_Name'] = module_name
     
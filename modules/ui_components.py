@@ -1,229 +1,203 @@
 """
 UI components for the UOM Results Ranking Tool.
 Contains all Streamlit UI rendering functions.
+
+configure_page() must be the first Streamlit call in the entrypoint.
 """
 
+import re
+import markdown
 import streamlit as st
 from typing import Dict, List
 
+from .config import STYLESHEET_PATH
 
-def render_header():
-    """Render the application header."""
+
+def _minify_css(css: str) -> str:
+    """Strip comments and collapse whitespace in a stylesheet."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{}:;,])\s*", r"\1", css).strip()
+
+
+@st.cache_resource(show_spinner=False)
+def _header_css() -> str:
+    """
+    Custom CSS for better UX - supports both light and dark mode.
+    
+    Read and minified once per process and shared by every session.
+    """
+    with open(STYLESHEET_PATH, encoding="utf-8") as css_file:
+        return f"<style>{_minify_css(css_file.read())}</style>"
+
+
+_HEADER_HTML = """
+<div class="main-header">
+    <h1>📊 UOM Results Ranking Tool</h1>
+    <p>Easily process exam results and generate student rankings</p>
+</div>
+"""
+
+_HOW_IT_WORKS_INTRO_MD = """
+### 🔄 Understanding the Append Behavior
+
+This tool is designed to **build your result sheet progressively**. Here's what you need to know:
+
+#### 1. 📁 Department File - **ONLY NEEDS STUDENT INFO!** (Excel or CSV)
+"""
+
+_DEPT_FILE_NOTE_MD = """
+**Important**: Your department file should ONLY contain student information:
+- ✅ **Required**: `Index` column (e.g., 230001A, 230002B) // no need in order
+- ✅ Optional: `Name`, `Email`, `Firstname`, `Lastname` (helpful for identification)
+
+**❌ DO NOT manually add module codes or grades** - the tool does this automatically!
+"""
+
+_HOW_IT_WORKS_MD = """
+**Example of a valid department file:**
+
+| Index   | Name           | Email                  |
+|---------|----------------|------------------------|
+| 230001A | John Doe       | john@uom.lk             |
+| 230002B | Jane Smith     | jane@uom.lk             |
+| 230003C | Bob Johnson    | bob@uom.lk              |
+
+👆 **That's it!** Just student info, no module columns needed.
+
+---
+
+#### 2. 📄 Result PDFs - **AUTOMATICALLY PROCESSED**
+
+Upload result PDFs one by one. For each PDF, the tool will:
+
+- ✅ **Automatically detect** the module code (e.g., CS2043, MA1024)
+- ✅ **Extract all grades** from the PDF
+- ✅ **Append as a new column** to your data (e.g., CS2043_Grade)
+- ✅ **Preserve all previously added** module grades
+
+---
+
+#### 3. ⚖️ Weights - **YOU JUST SET CREDIT VALUES**
+
+You must set credit weights for:
+
+- New modules you're adding (when uploading PDF)
+- AND all previously added modules (if continuing from an exported file)
+
+---
+
+### 📝 Complete Example Workflow:
+
+| Step | What You Do | What Happens |
+|------|-------------|--------------|
+| 1 | Upload `students.xlsx` with Index, Name, Email | ✅ Student list loaded |
+| 2 | Upload `CS2043_Results.pdf` + set weight = 3 | ✅ Tool adds `CS2043_Grade` column automatically |
+| 3 | Upload `MA1024_Results.pdf` + set weight = 3 | ✅ Tool adds `MA1024_Grade` column automatically |
+| 4 | Click "Generate Rankings" | ✅ SGPA calculated, rankings ready! |
+| 5 | Download the results | ✅ Get complete file with all grades + SGPA + Rank |
+
+---
+
+### 💾 Continuing Your Work Later
+
+If you download results and want to add more modules later:
+
+1. Upload the **previously downloaded file** (which now has module columns)
+2. The tool will detect existing modules automatically
+3. Continue adding new PDFs!
+
+---
+
+### ⚠️ Common Mistake to Avoid
+
+❌ **DON'T** manually add columns like `CS2043_Grade` to your department file  
+✅ **DO** just upload your simple student list and let the tool add grades from PDFs
+"""
+
+_DEPT_FILE_GUIDE_HTML = """
+<div class="info-box">
+    <h4>📋 What Should Your Department File Contain?</h4>
+    <p><strong>Required:</strong></p>
+    <ul>
+        <li>✅ <code>Index</code> column with student index numbers (e.g., 230001A, 230002B)</li>
+    </ul>
+    <p><strong>Optional (but recommended):</strong></p>
+    <ul>
+        <li>✅ <code>Name</code>, <code>Firstname</code>, <code>Lastname</code> - for easier identification</li>
+        <li>✅ <code>Email</code>, <code>Phone</code> - any other student info you want to keep</li>
+    </ul>
+    <p><strong>❌ DO NOT include:</strong></p>
+    <ul>
+        <li>❌ Module code columns (CS2043, MA1024, etc.)</li>
+        <li>❌ Grade columns (CS2043_Grade, etc.)</li>
+        <li>❌ SGPA or Rank columns</li>
+    </ul>
+    <p>🤖 <strong>The tool will automatically add module grades when you upload PDFs!</strong></p>
+</div>
+"""
+
+_WARNING_BOX_HTML = """
+<div class="warning-box">
+    <h4>⚠️ Previously Added Modules Detected!</h4>
+    <p>Your department file already contains grades for these modules. 
+    <strong>Set weights for ALL of them below</strong> to calculate the correct SGPA.</p>
+</div>
+"""
+
+_EXISTING_WEIGHTS_HEADING_HTML = """
+<h4>⚖️ Set Weights for Existing Modules</h4>
+<p><em>💡 Enter the credit value for each module (common values: 2 or 3)</em></p>
+"""
+
+_WEIGHT_INPUT_HEADING_HTML = """
+<h3>⚖️ Set Module Weights (Credits)</h3>
+<div class="info-box">
+    <strong>💡 Tip:</strong> Enter the credit value for each module. Common values: 2 or 3 credits.
+</div>
+"""
+
+_FOOTER_HTML = """
+<div style="text-align: center; color: #666; padding: 1rem;">
+    <p>Made with ❤️ for UOM Students</p>
+</div>
+"""
+
+_CHIP_TEMPLATE = '<span class="module-chip">{module}{weight}</span>'
+
+
+def configure_page():
+    """Set the page title, icon and layout (must run before any other Streamlit call)."""
     st.set_page_config(
         page_title="UOM Results Ranking Tool",
         page_icon="📊",
         layout="wide"
     )
-    
-    # Custom CSS for better UX - supports both light and dark mode
-    st.markdown("""
-    <style>
-        /* Main header - works in both modes */
-        .main-header {
-            text-align: center;
-            padding: 1.5rem 1rem;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white !important;
-            border-radius: 12px;
-            margin-bottom: 2rem;
-            box-shadow: 0 4px 15px rgba(102, 126, 234, 0.3);
-        }
-        .main-header h1, .main-header p {
-            color: white !important;
-            margin: 0.5rem 0;
-        }
-        
-        /* Info boxes - dark mode compatible */
-        .info-box {
-            background-color: rgba(33, 150, 243, 0.15);
-            border-left: 4px solid #2196F3;
-            padding: 1rem;
-            border-radius: 0 8px 8px 0;
-            margin: 1rem 0;
-            color: inherit;
-        }
-        .warning-box {
-            background-color: rgba(255, 193, 7, 0.15);
-            border-left: 4px solid #ffc107;
-            padding: 1rem;
-            border-radius: 0 8px 8px 0;
-            margin: 1rem 0;
-            color: inherit;
-        }
-        .warning-box h4 {
-            color: #ffc107 !important;
-        }
-        .success-box {
-            background-color: rgba(40, 167, 69, 0.15);
-            border-left: 4px solid #28a745;
-            padding: 1rem;
-            border-radius: 0 8px 8px 0;
-            margin: 1rem 0;
-            color: inherit;
-        }
-        .success-box h4 {
-            color: #28a745 !important;
-        }
-        
-        /* Module chips */
-        .module-chip {
-            display: inline-block;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white !important;
-            padding: 0.4rem 0.9rem;
-            border-radius: 20px;
-            margin: 0.3rem;
-            font-size: 0.9rem;
-            font-weight: 500;
-        }
-        
-        /* Step headers - dark mode compatible */
-        .step-header {
-            background: rgba(102, 126, 234, 0.1);
-            padding: 0.8rem 1rem;
-            border-radius: 8px;
-            margin: 1.5rem 0 1rem 0;
-            border-left: 4px solid #667eea;
-        }
-        .step-header h3 {
-            color: inherit !important;
-            margin: 0;
-        }
-        
-        /* Button styling */
-        .stButton>button {
-            width: 100%;
-        }
-        
-        /* Ensure text visibility in dark mode */
-        @media (prefers-color-scheme: dark) {
-            .info-box, .warning-box, .success-box {
-                color: #e0e0e0;
-            }
-            .step-header {
-                background: rgba(102, 126, 234, 0.2);
-            }
-        }
-        
-        /* For Streamlit's internal dark mode */
-        [data-testid="stAppViewContainer"][data-theme="dark"] .info-box,
-        [data-testid="stAppViewContainer"][data-theme="dark"] .warning-box,
-        [data-testid="stAppViewContainer"][data-theme="dark"] .success-box {
-            color: #e0e0e0;
-        }
-    </style>
-    """, unsafe_allow_html=True)
-    
-    st.markdown("""
-    <div class="main-header">
-        <h1>📊 UOM Results Ranking Tool</h1>
-        <p>Easily process exam results and generate student rankings</p>
-    </div>
-    """, unsafe_allow_html=True)
+
+
+@st.cache_data(show_spinner=False)
+def _markdown_to_html(text: str) -> str:
+    """Render static markdown to HTML once per process."""
+    return markdown.markdown(text, extensions=["tables"])
+
+
+def render_header():
+    """Render the application header."""
+    # Emitted on every run: Streamlit drops elements a rerun does not repeat
+    st.html(_header_css() + _HEADER_HTML)
 
 
 def render_how_it_works():
     """Render the 'How It Works' section."""
     with st.expander("📖 How This Tool Works (Click to learn more)", expanded=True):
-        st.markdown("""
-        ### 🔄 Understanding the Append Behavior
-        
-        This tool is designed to **build your result sheet progressively**. Here's what you need to know:
-        
-        #### 1. 📁 Department File - **ONLY NEEDS STUDENT INFO!** (Excel or CSV)
-        
-        """)
-        
-        st.info("""
-        **Important**: Your department file should ONLY contain student information:
-        - ✅ **Required**: `Index` column (e.g., 230001A, 230002B) // no need in order
-        - ✅ Optional: `Name`, `Email`, `Firstname`, `Lastname` (helpful for identification)
-        
-        **❌ DO NOT manually add module codes or grades** - the tool does this automatically!
-        """)
-        
-        st.markdown("""
-        **Example of a valid department file:**
-        
-        | Index   | Name           | Email                  |
-        |---------|----------------|------------------------|
-        | 230001A | John Doe       | john@uom.lk             |
-        | 230002B | Jane Smith     | jane@uom.lk             |
-        | 230003C | Bob Johnson    | bob@uom.lk              |
-        
-        👆 **That's it!** Just student info, no module columns needed.
-        
-        ---
-        
-        #### 2. 📄 Result PDFs - **AUTOMATICALLY PROCESSED**
-        
-        Upload result PDFs one by one. For each PDF, the tool will:
-        - ✅ **Automatically detect** the module code (e.g., CS2043, MA1024)
-        - ✅ **Extract all grades** from the PDF
-        - ✅ **Append as a new column** to your data (e.g., CS2043_Grade)
-        - ✅ **Preserve all previously added** module grades
-        
-        ---
-        
-        #### 3. ⚖️ Weights - **YOU JUST SET CREDIT VALUES**
-        
-        You must set credit weights for:
-        - New modules you're adding (when uploading PDF)
-        - AND all previously added modules (if continuing from an exported file)
-        
-        ---
-        
-        ### 📝 Complete Example Workflow:
-        
-        | Step | What You Do | What Happens |
-        |------|-------------|--------------|
-        | 1 | Upload `students.xlsx` with Index, Name, Email | ✅ Student list loaded |
-        | 2 | Upload `CS2043_Results.pdf` + set weight = 3 | ✅ Tool adds `CS2043_Grade` column automatically |
-        | 3 | Upload `MA1024_Results.pdf` + set weight = 3 | ✅ Tool adds `MA1024_Grade` column automatically |
-        | 4 | Click "Generate Rankings" | ✅ SGPA calculated, rankings ready! |
-        | 5 | Download the results | ✅ Get complete file with all grades + SGPA + Rank |
-        
-        ---
-        
-        ### 💾 Continuing Your Work Later
-        
-        If you download results and want to add more modules later:
-        1. Upload the **previously downloaded file** (which now has module columns)
-        2. The tool will detect existing modules automatically
-        3. Continue adding new PDFs!
-        
-        ---
-        
-        ### ⚠️ Common Mistake to Avoid
-        
-        ❌ **DON'T** manually add columns like `CS2043_Grade` to your department file  
-        ✅ **DO** just upload your simple student list and let the tool add grades from PDFs
-        """)
+        st.markdown(_markdown_to_html(_HOW_IT_WORKS_INTRO_MD), unsafe_allow_html=True)
+        st.info(_DEPT_FILE_NOTE_MD)
+        st.markdown(_markdown_to_html(_HOW_IT_WORKS_MD), unsafe_allow_html=True)
 
 
 def render_department_file_guide():
     """Show a guide about department file requirements."""
-    st.markdown("""
-    <div class="info-box">
-        <h4>📋 What Should Your Department File Contain?</h4>
-        <p><strong>Required:</strong></p>
-        <ul>
-            <li>✅ <code>Index</code> column with student index numbers (e.g., 230001A, 230002B)</li>
-        </ul>
-        <p><strong>Optional (but recommended):</strong></p>
-        <ul>
-            <li>✅ <code>Name</code>, <code>Firstname</code>, <code>Lastname</code> - for easier identification</li>
-            <li>✅ <code>Email</code>, <code>Phone</code> - any other student info you want to keep</li>
-        </ul>
-        <p><strong>❌ DO NOT include:</strong></p>
-        <ul>
-            <li>❌ Module code columns (CS2043, MA1024, etc.)</li>
-            <li>❌ Grade columns (CS2043_Grade, etc.)</li>
-            <li>❌ SGPA or Rank columns</li>
-        </ul>
-        <p>🤖 <strong>The tool will automatically add module grades when you upload PDFs!</strong></p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.html(_DEPT_FILE_GUIDE_HTML)
 
 
 def render_existing_modules_banner(modules: List[str], weights: Dict[str, float]) -> Dict[str, float]:
@@ -231,76 +205,83 @@ def render_existing_modules_banner(modules: List[str], weights: Dict[str, float]
     if not modules:
         return weights
     
-    st.markdown("""
-    <div class="warning-box">
-        <h4>⚠️ Previously Added Modules Detected!</h4>
-        <p>Your department file already contains grades for these modules. 
-        <strong>Set weights for ALL of them below</strong> to calculate the correct SGPA.</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
     # Show modules as chips for visual reference
-    chips_html = ""
-    for module in modules:
-        weight_str = f" ({weights.get(module, '?')} credits)" if module in weights else " (⚠️ set below)"
-        chips_html += f'<span class="module-chip">{module}{weight_str}</span>'
+    chips_html = "".join(
+        _CHIP_TEMPLATE.format(
+            module=module,
+            weight=f" ({weights[module]} credits)" if module in weights else " (⚠️ set below)"
+        )
+        for module in modules
+    )
     
-    st.markdown(f"<p>{chips_html}</p>", unsafe_allow_html=True)
+    # Banner, chips and the weights heading go out as a single element
+    st.html(_WARNING_BOX_HTML + f"<p>{chips_html}</p>" + _EXISTING_WEIGHTS_HEADING_HTML)
     
     # Immediately show weight inputs for existing modules
-    st.markdown("#### ⚖️ Set Weights for Existing Modules")
-    st.caption("💡 Enter the credit value for each module (common values: 2 or 3)")
-    
-    updated_weights = weights.copy()
-    num_cols = min(len(modules), 4)
-    cols = st.columns(num_cols)
-    
-    for i, module in enumerate(modules):
-        col_idx = i % num_cols
-        with cols[col_idx]:
-            default_val = weights.get(module, 3.0)
-            updated_weights[module] = st.number_input(
-                f"**{module}**",
-                min_value=0.5,
-                max_value=10.0,
-                value=float(default_val),
-                step=0.5,
-                key=f"existing_weight_{module}"
-            )
+    widget_keys = _widget_keys(modules, "existing_weight")
+    _weight_grid(widget_keys, _default_weights(modules, weights), "existing_weight")
     
-    return updated_weights
+    return {**weights, **_read_weights(widget_keys)}
 
 
 def render_weight_input(modules: List[str], existing_weights: Dict[str, float]) -> Dict[str, float]:
     """Render weight input section for modules."""
-    st.markdown("### ⚖️ Set Module Weights (Credits)")
+    st.html(_WEIGHT_INPUT_HEADING_HTML)
     
-    st.info("💡 **Tip**: Enter the credit value for each module. Common values: 2 or 3 credits.")
+    widget_keys = _widget_keys(modules, "weight")
+    _weight_grid(widget_keys, _default_weights(modules, existing_weights), "weight")
     
-    weights = {}
-    cols = st.columns(min(len(modules), 4))
+    return _read_weights(widget_keys)
+
+
+def _widget_keys(modules: List[str], key_prefix: str) -> Dict[str, str]:
+    """Session-state key of each module's weight input."""
+    return {module: f"{key_prefix}_{module}" for module in modules}
+
+
+def _default_weights(modules: List[str], weights: Dict[str, float]) -> Dict[str, float]:
+    """Initial input value per module as a float (3 credits when not set yet)."""
+    return {module: float(weights.get(module, 3.0)) for module in modules}
+
+
+@st.fragment
+def _weight_grid(widget_keys: Dict[str, str], defaults: Dict[str, float], key_prefix: str):
+    """
+    Render one credit-weight input per module, laid out by a CSS grid.
     
-    for i, module in enumerate(modules):
-        col_idx = i % len(cols)
-        with cols[col_idx]:
-            default_val = existing_weights.get(module, 3.0)
-            weights[module] = st.number_input(
-                f"**{module}**",
-                min_value=0.5,
-                max_value=10.0,
-                value=float(default_val),
-                step=0.5,
-                key=f"weight_{module}"
-            )
+    The inputs sit in a form, so edits are applied together on submit, and
+    the fragment means a submit only reruns this grid. Callers read the
+    applied values back with _read_weights.
+    """
+    if not widget_keys:
+        return
     
-    return weights
+    with st.form(f"weights_form_{key_prefix}"):
+        # The container key adds an st-key-weight_grid_* class styled as a grid
+        # in uom.css, replacing one server-side column container per column
+        with st.container(key=f"weight_grid_{key_prefix}"):
+            for module, widget_key in widget_keys.items():
+                st.number_input(
+                    f"**{module}**",
+                    min_value=0.5,
+                    max_value=10.0,
+                    value=defaults[module],
+                    step=0.5,
+                    key=widget_key
+                )
+        
+        st.form_submit_button("Apply weights")
+        # Form values only reach session state on submit, so unapplied edits
+        # can't be detected - say so rather than ranking on old weights silently
+        st.caption("⚠️ Press **Apply weights** after editing. Rankings use the last applied weights.")
+
+
+def _read_weights(widget_keys: Dict[str, str]) -> Dict[str, float]:
+    """Read the weights entered in a _weight_grid from session state."""
+    return {module: st.session_state[widget_key] for module, widget_key in widget_keys.items()}
 
 
 def render_footer():
     """Render the application footer."""
     st.markdown("---")
-    st.markdown("""
-    <div style="text-align: center; color: #666; padding: 1rem;">
-        <p>Made with ❤️ for UOM Students</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.html(_FOOTER_HTML)